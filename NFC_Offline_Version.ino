@@ -35,14 +35,24 @@ LiquidCrystal_I2C lcd(0x27, 16, 2);
 const char* FILE_PATH = "/fila_ponto.txt";
 unsigned long lastSyncAttempt = 0;
 const unsigned long syncInterval = 10000;
+// Espera extra pedida pelo servidor sobrecarregado (Retry-After, em ms)
+unsigned long esperaServidor = 0;
+// Linhas da fila por requisição em /ponto/lote (o servidor recusa lotes grandes)
+const int LOTE_LINHAS = 50;
 
 // Protótipos
 void connectToWiFi();
 void handleCardRead();
 void salvarOffline(String cardUid, time_t timestamp);
 void processarFilaOffline();
+void processarFilaLinhaALinha(const String& pendingData);
+int enviarLote(const String& loteData, String& resposta);
+bool lerManter(const String& resposta, bool manter[], int tamanho);
+void gravarFila(const String& dados);
 int enviarRequisicaoLogicaCompleta(String cardUid, long timestamp);
 int enviarRequisicao(String endpoint, String cardUid, long timestamp);
+void prepararCabecalhos(HTTPClient& http);
+void lerRetryAfter(HTTPClient& http);
 
 void setup() {
   Serial.begin(115200);
@@ -99,7 +109,7 @@ void loop() {
 
   handleCardRead();
   
-  if (WiFi.status() == WL_CONNECTED && (millis() - lastSyncAttempt > syncInterval)) {
+  if (WiFi.status() == WL_CONNECTED && (millis() - lastSyncAttempt > syncInterval + esperaServidor)) {
     processarFilaOffline();
     lastSyncAttempt = millis();
   }
@@ -156,6 +166,7 @@ void salvarOffline(String cardUid, time_t timestamp) {
 }
 
 void processarFilaOffline() {
+  esperaServidor = 0;
   if (!LittleFS.exists(FILE_PATH)) return;
   File file = LittleFS.open(FILE_PATH, "r");
   if (!file) return;
@@ -172,9 +183,105 @@ void processarFilaOffline() {
   }
   file.close();
 
+  // Normaliza a fila (remove linhas vazias) para que a numeração
+  // das linhas bata com a resposta do servidor
+  String loteData = "";
+  int strIndex = 0;
+  while (strIndex < pendingData.length()) {
+    int endIndex = pendingData.indexOf('\n', strIndex);
+    if (endIndex == -1) endIndex = pendingData.length();
+    String line = pendingData.substring(strIndex, endIndex);
+    line.trim();
+    if (line.length() > 0) loteData += line + "\n";
+    strIndex = endIndex + 1;
+  }
+
+  // Envia a fila em partes de até LOTE_LINHAS linhas; a fila é regravada depois
+  // de cada parte aceita, para que uma queda no meio não reenvie o que já entrou
+  String mantidas = "";
+  while (loteData.length() > 0) {
+    int fimParte = 0;
+    for (int i = 0; i < LOTE_LINHAS && fimParte < loteData.length(); i++) {
+      fimParte = loteData.indexOf('\n', fimParte) + 1;
+    }
+    String parte = loteData.substring(0, fimParte);
+    String resto = loteData.substring(fimParte);
+
+    String resposta;
+    int httpCode = enviarLote(parte, resposta);
+
+    if (httpCode == 404) {
+      // Servidor antigo, sem /ponto/lote
+      processarFilaLinhaALinha(mantidas + loteData);
+      return;
+    }
+    if (httpCode != 200) return; // Mantém o resto da fila para a próxima tentativa (429: depois do Retry-After)
+
+    // O servidor devolve apenas as linhas da parte que devem permanecer na fila.
+    // Se a resposta vier ilegível, a parte já foi gravada no servidor: descarta-a
+    // em vez de reenviar batidas aceitas.
+    bool manter[LOTE_LINHAS + 1];
+    if (!lerManter(resposta, manter, LOTE_LINHAS)) {
+      Serial.println("Resposta do lote ilegivel: linhas enviadas descartadas.");
+    }
+    int lineNumber = 0;
+    strIndex = 0;
+    while (strIndex < parte.length()) {
+      int endIndex = parte.indexOf('\n', strIndex);
+      lineNumber++;
+      if (manter[lineNumber]) mantidas += parte.substring(strIndex, endIndex) + "\n";
+      strIndex = endIndex + 1;
+    }
+
+    loteData = resto;
+    gravarFila(mantidas + loteData);
+    if (esperaServidor > 0) return; // Servidor pediu para esperar (Retry-After)
+  }
+}
+
+// Lê o array "manter" da resposta do lote sem montar um documento JSON, marcando
+// manter[n] para cada linha n da parte. Retorna false se o array não vier completo.
+bool lerManter(const String& resposta, bool manter[], int tamanho) {
+  for (int i = 0; i <= tamanho; i++) manter[i] = false;
+  int pos = resposta.indexOf("\"manter\"");
+  if (pos == -1) return false;
+  pos = resposta.indexOf('[', pos);
+  if (pos == -1) return false;
+
+  long numero = -1;
+  for (pos++; pos < resposta.length(); pos++) {
+    char c = resposta[pos];
+    if (isDigit(c)) {
+      numero = (numero < 0 ? 0 : numero * 10) + (c - '0');
+      continue;
+    }
+    if (numero >= 1 && numero <= tamanho) manter[numero] = true;
+    numero = -1;
+    if (c == ']') return true;
+    if (c != ',' && !isSpace(c)) {
+      for (int i = 0; i <= tamanho; i++) manter[i] = false;
+      return false;
+    }
+  }
+  for (int i = 0; i <= tamanho; i++) manter[i] = false;
+  return false;
+}
+
+void gravarFila(const String& dados) {
+  if (dados.length() == 0) {
+    LittleFS.remove(FILE_PATH);
+  } else {
+    File fileWrite = LittleFS.open(FILE_PATH, "w");
+    fileWrite.print(dados);
+    fileWrite.close();
+  }
+}
+
+void processarFilaLinhaALinha(const String& pendingData) {
   String remainingData = ""; 
   int processedCount = 0;
   int strIndex = 0;
+  bool ocupado = false; // Depois de um 429 o resto da fila espera a próxima sincronização
 
   while (strIndex < pendingData.length()) {
     int endIndex = pendingData.indexOf('\n', strIndex);
@@ -195,8 +302,9 @@ void processarFilaOffline() {
           lineUID = line;
       }
 
-      int result = enviarRequisicaoLogicaCompleta(lineUID, rawTs);
-      if (result != -1) {
+      int result = ocupado ? 429 : enviarRequisicaoLogicaCompleta(lineUID, rawTs);
+      if (result == 429) ocupado = true;
+      if (result != -1 && result != 429) {
         processedCount++;
       } else {
         remainingData += line + "\n";
@@ -216,13 +324,30 @@ void processarFilaOffline() {
   }
 }
 
+int enviarLote(const String& loteData, String& resposta) {
+  WiFiClient client;
+  HTTPClient http;
+  String url = "http://" + String(serverAddress) + ":" + String(serverPort) + "/ponto/lote?resumo=1";
+
+  if (http.begin(client, url)) {
+    http.addHeader("Content-Type", "text/plain");
+    prepararCabecalhos(http);
+    int code = http.POST(loteData);
+    lerRetryAfter(http);
+    if (code == 200) resposta = http.getString();
+    http.end();
+    return code;
+  }
+  return -1;
+}
+
 int enviarRequisicaoLogicaCompleta(String cardUid, long timestamp) {
   int httpCode = enviarRequisicao("/ponto/entrada", cardUid, timestamp);
   if (httpCode == 201) return 201;
   
   if (httpCode == 400) {
     int httpCodeSaida = enviarRequisicao("/ponto/saida", cardUid, timestamp);
-    if (httpCodeSaida == 200) return 200;
+    if (httpCodeSaida == 200 || httpCodeSaida == 429) return httpCodeSaida;
   }
   return httpCode;
 }
@@ -234,18 +359,33 @@ int enviarRequisicao(String endpoint, String cardUid, long timestamp) {
   
   if (http.begin(client, url)) {
     http.addHeader("Content-Type", "application/json");
+    prepararCabecalhos(http);
     StaticJsonDocument<200> doc;
     doc["card_uid"] = cardUid;
     doc["timestamp"] = timestamp;
     String payload;
     serializeJson(doc, payload);
     int code = http.POST(payload);
+    lerRetryAfter(http);
     http.end();
     return code;
   }
   return -1;
 }
 
+// Identifica o leitor para o limite de taxa do servidor e pede o Retry-After de volta
+void prepararCabecalhos(HTTPClient& http) {
+  http.addHeader("X-Dispositivo", WiFi.macAddress());
+  const char* cabecalhos[] = {"Retry-After"};
+  http.collectHeaders(cabecalhos, 1);
+}
+
+void lerRetryAfter(HTTPClient& http) {
+  if (http.hasHeader("Retry-After")) {
+    esperaServidor = max(esperaServidor, (unsigned long)http.header("Retry-After").toInt() * 1000UL);
+  }
+}
+
 void connectToWiFi() {
   if (WiFi.status() == WL_CONNECTED) return;
   WiFi.begin(ssid, password);
@@ -11,13 +11,16 @@ import os
 # Adiciona o diretório atual ao path para importar api.py
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from api import app, db, Admin
+from api import create_app, db, Admin, aplicar_migracoes
+
+# Só o banco: sem rotas, Swagger, métricas nem agendador
+app = create_app(web=False)
 
 def add_admin(email):
     """Adiciona um novo administrador ao banco."""
     with app.app_context():
-        # Criar as tabelas se não existirem
-        db.create_all()
+        # Criar as tabelas (e aplicar migrações) se ainda não existirem
+        aplicar_migracoes()
         
         # Verifica se o admin já existe
         admin_existente = Admin.query.filter_by(email=email.lower()).first()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga da API de ponto usando um SQLite local no lugar do MySQL.
+
+Popula um banco sintético (usuários, anos de batidas e pontos em aberto) e simula
+uma frota de leitores ESP8266 seguindo o protocolo do NFC_Offline_Version.ino,
+junto com usuários do dashboard. Ao final imprime (ou grava) um JSON com vazão,
+latências p50/p95/p99 e consultas SQL por requisição para cada rota, para comparar
+execuções entre commits.
+
+Protocolos de leitor (--protocolo):
+  lote    firmware atual: a fila /fila_ponto.txt é enviada em /ponto/lote, em partes de 50 linhas
+  legado  firmware antigo: cada linha tenta /ponto/entrada e, se der 400, /ponto/saida
+  toggle  uma requisição por batida em /ponto, com Idempotency-Key
+
+Uso:
+  python benchmark.py --usuarios 200 --anos 2 --leitores 20 --duracao 30
+  python benchmark.py --saida bench_output.txt
+  python benchmark.py --comparar bench_anterior.json
+  python benchmark.py --protocolo legado --grupo-commit --comparar um_commit_por_batida.json
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark de carga da API de ponto (SQLite local).")
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'ponto_benchmark.sqlite3'),
+                        help="Arquivo SQLite usado no teste (é recriado).")
+    parser.add_argument('--usuarios', type=int, default=200)
+    parser.add_argument('--anos', type=float, default=1.0, help="Anos de histórico sintético.")
+    parser.add_argument('--abertos', type=int, default=30, help="Usuários com ponto em aberto no início.")
+    parser.add_argument('--leitores', type=int, default=10, help="Leitores NFC simultâneos.")
+    parser.add_argument('--dashboards', type=int, default=2, help="Dashboards abertos simultâneos.")
+    parser.add_argument('--fila', type=int, default=50, help="Batidas acumuladas por leitor durante a queda de WiFi.")
+    parser.add_argument('--protocolo', choices=['lote', 'legado', 'toggle'], default='lote')
+    parser.add_argument('--duracao', type=float, default=15.0, help="Segundos de carga após a sincronização.")
+    parser.add_argument('--grupo-commit', action='store_true',
+                        help="Liga GRUPO_COMMIT (batidas de /ponto/entrada, /ponto/saida e /ponto em lotes).")
+    parser.add_argument('--cache-respostas', action='store_true',
+                        help="Liga CACHE_RESPOSTAS (ETag/304 nas leituras do dashboard).")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--saida', help="Grava o JSON neste arquivo em vez da saída padrão.")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior para comparar as latências p95.")
+    return parser.parse_args()
+
+args = parse_args()
+
+# O banco precisa estar definido antes de importar a API
+if os.path.exists(args.db):
+    os.remove(args.db)
+os.environ['DATABASE_URL'] = f'sqlite:///{args.db}'
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event  # noqa: E402
+from api import create_app, db, Usuario, RegistroPonto, BR_TZ, reconstruir_totais_diarios  # noqa: E402
+
+# Sem limite de taxa dos leitores: o benchmark mede a vazão bruta das batidas
+app = create_app({'SWAGGER_ATIVO': False, 'GRUPO_COMMIT': args.grupo_commit, 'CACHE_RESPOSTAS': args.cache_respostas,
+                  'LIMITE_DISPOSITIVOS': False})
+
+# --- Contagem de consultas por requisição ---
+
+_local = threading.local()
+
+def _contar_consulta(*_):
+    _local.consultas = getattr(_local, 'consultas', 0) + 1
+
+class Coletor:
+    """Acumula latência, status e número de consultas por rota."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.amostras = {}
+
+    def medir(self, rota, chamada):
+        _local.consultas = 0
+        inicio = time.perf_counter()
+        resposta = chamada()
+        ms = (time.perf_counter() - inicio) * 1000
+        with self._lock:
+            self.amostras.setdefault(rota, []).append((ms, resposta.status_code, _local.consultas))
+        return resposta
+
+def percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return None
+    indice = max(0, min(len(valores_ordenados) - 1, int(round(p / 100 * len(valores_ordenados))) - 1))
+    return round(valores_ordenados[indice], 2)
+
+def resumir(amostras, duracao):
+    rotas = {}
+    for rota, itens in sorted(amostras.items()):
+        latencias = sorted(ms for ms, _, _ in itens)
+        consultas = [q for _, _, q in itens]
+        rotas[rota] = {
+            'requisicoes': len(itens),
+            'erros_5xx': sum(1 for _, status, _ in itens if status >= 500),
+            'status': {str(s): sum(1 for _, st, _ in itens if st == s) for s in sorted({st for _, st, _ in itens})},
+            'rps': round(len(itens) / duracao, 2) if duracao else None,
+            'media_ms': round(sum(latencias) / len(latencias), 2),
+            'p50_ms': percentil(latencias, 50),
+            'p95_ms': percentil(latencias, 95),
+            'p99_ms': percentil(latencias, 99),
+            'consultas_media': round(sum(consultas) / len(consultas), 2),
+            'consultas_max': max(consultas)
+        }
+    return rotas
+
+# --- Dados sintéticos ---
+
+def popular_banco(rng):
+    """Cria usuários, um turno por dia útil ao longo de --anos e alguns pontos abertos."""
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(Usuario), [
+            {'card_uid': f'{i:08X}', 'nome': f'Voluntario {i:04d}'} for i in range(args.usuarios)
+        ])
+        db.session.commit()
+        ids = [u.id for u in Usuario.query.order_by(Usuario.id)]
+
+        hoje = datetime.now(BR_TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+        dias = int(args.anos * 365)
+        lote = []
+        total = 0
+        for d in range(dias, 0, -1):
+            dia = hoje - timedelta(days=d)
+            if dia.weekday() >= 5:
+                continue
+            for id_usuario in ids:
+                entrada = dia + timedelta(hours=7, minutes=rng.randint(0, 120))
+                saida = entrada + timedelta(hours=rng.randint(6, 9), minutes=rng.randint(0, 59))
+                lote.append({'id_usuario': id_usuario, 'data_entrada': entrada, 'data_saida': saida})
+            if len(lote) >= 5000:
+                db.session.execute(db.insert(RegistroPonto), lote)
+                total += len(lote)
+                lote = []
+        for id_usuario in rng.sample(ids, min(args.abertos, len(ids))):
+            # Abertos antes da queda de WiFi simulada (ver relogio_simulado)
+            entrada = datetime.fromtimestamp(_BASE_RELOGIO - 3 * 3600, tz=BR_TZ)
+            lote.append({'id_usuario': id_usuario, 'data_entrada': entrada, 'data_saida': None})
+        if lote:
+            db.session.execute(db.insert(RegistroPonto), lote)
+            total += len(lote)
+        db.session.commit()
+        reconstruir_totais_diarios()
+        return total
+
+# --- Simulação ---
+
+# Linhas por requisição em /ponto/lote no NFC_Offline_Version.ino
+LOTE_LINHAS = 50
+
+# Relógio compartilhado (os leitores sincronizam o RTC via NTP), acelerado 60x
+# para que uma execução curta cubra um turno
+_BASE_RELOGIO = int(time.time()) - 3600 * 6
+_INICIO_RELOGIO = time.monotonic()
+
+def relogio_simulado():
+    return int(_BASE_RELOGIO + (time.monotonic() - _INICIO_RELOGIO) * 60)
+
+class Leitor(threading.Thread):
+    """Um leitor NFC: sincroniza a fila acumulada na queda e depois registra batidas ao vivo."""
+
+    def __init__(self, numero, cartoes, coletor, fim, rng):
+        super().__init__(name=f'leitor-{numero}', daemon=True)
+        self.cartoes = cartoes
+        self.coletor = coletor
+        self.fim = fim
+        self.rng = rng
+        self.cliente = app.test_client()
+
+    def fila_offline(self):
+        """Batidas lidas durante a queda de WiFi (até 2h antes do início)."""
+        horarios = sorted(self.rng.randint(_BASE_RELOGIO - 7200, _BASE_RELOGIO) for _ in range(args.fila))
+        return [(self.rng.choice(self.cartoes), ts) for ts in horarios]
+
+    def enviar_legado(self, card_uid, ts):
+        # enviarRequisicaoLogicaCompleta(): entrada primeiro, saída se já houver ponto aberto
+        corpo = {'card_uid': card_uid, 'timestamp': ts}
+        r = self.coletor.medir('POST /ponto/entrada', lambda: self.cliente.post('/ponto/entrada', json=corpo))
+        if r.status_code == 400:
+            self.coletor.medir('POST /ponto/saida', lambda: self.cliente.post('/ponto/saida', json=corpo))
+
+    def enviar_toggle(self, card_uid, ts):
+        self.coletor.medir('POST /ponto', lambda: self.cliente.post(
+            '/ponto', json={'card_uid': card_uid, 'timestamp': ts}, headers={'Idempotency-Key': f'{card_uid};{ts}'}
+        ))
+
+    def enviar_fila(self, fila):
+        if args.protocolo == 'lote':
+            # Em partes de LOTE_LINHAS, como o sketch
+            for inicio in range(0, len(fila), LOTE_LINHAS):
+                corpo = ''.join(f'{uid};{ts}\n' for uid, ts in fila[inicio:inicio + LOTE_LINHAS])
+                self.coletor.medir('POST /ponto/lote', lambda: self.cliente.post(
+                    '/ponto/lote?resumo=1', data=corpo, content_type='text/plain'
+                ))
+        else:
+            for uid, ts in fila:
+                self.enviar_batida(uid, ts)
+
+    def enviar_batida(self, card_uid, ts):
+        if args.protocolo == 'toggle':
+            self.enviar_toggle(card_uid, ts)
+        elif args.protocolo == 'legado':
+            self.enviar_legado(card_uid, ts)
+        else:
+            self.enviar_fila([(card_uid, ts)])
+
+    def run(self):
+        # Volta do WiFi: processarFilaOffline() com tudo que foi lido offline
+        self.enviar_fila(self.fila_offline())
+        while time.monotonic() < self.fim:
+            self.enviar_batida(self.rng.choice(self.cartoes), relogio_simulado())
+            time.sleep(self.rng.uniform(0.01, 0.05))
+
+class Dashboard(threading.Thread):
+    """Um navegador com o dashboard aberto, atualizando as abas principais."""
+
+    def __init__(self, numero, cartoes, coletor, fim, rng):
+        super().__init__(name=f'dashboard-{numero}', daemon=True)
+        self.cartoes = cartoes
+        self.coletor = coletor
+        self.fim = fim
+        self.rng = rng
+        self.cliente = app.test_client()
+        self.etags = {}
+
+    def get(self, rota, url):
+        """GET como o navegador faz: revalida com If-None-Match quando já tem ETag."""
+        headers = {'If-None-Match': self.etags[url]} if url in self.etags else {}
+        resposta = self.coletor.medir(rota, lambda: self.cliente.get(url, headers=headers))
+        if resposta.headers.get('ETag'):
+            self.etags[url] = resposta.headers['ETag']
+
+    def run(self):
+        hoje = datetime.now(BR_TZ).date().isoformat()
+        while time.monotonic() < self.fim:
+            self.get('GET /api/usuarios', '/api/usuarios')
+            self.get('GET /api/usuarios/pontos-abertos', '/api/usuarios/pontos-abertos')
+            self.get('GET /api/historico', f'/api/historico?data={hoje}')
+            card_uid = self.rng.choice(self.cartoes)
+            self.coletor.medir('GET /ponto/total/<card_uid>', lambda: self.cliente.get(f'/ponto/total/{card_uid}'))
+            time.sleep(self.rng.uniform(0.05, 0.2))
+
+def versao_git():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def comparar(atual, caminho_anterior):
+    with open(caminho_anterior) as f:
+        anterior = json.load(f)
+    print(f"\n{'rota':40} {'p95 antes':>10} {'p95 agora':>10} {'delta':>8}", file=sys.stderr)
+    for rota, dados in atual['rotas'].items():
+        antes = anterior.get('rotas', {}).get(rota, {}).get('p95_ms')
+        agora = dados['p95_ms']
+        delta = f"{(agora - antes) / antes * 100:+.0f}%" if antes else 'novo'
+        print(f"{rota:40} {antes if antes is not None else '-':>10} {agora:>10} {delta:>8}", file=sys.stderr)
+
+def main():
+    rng = random.Random(args.seed)
+    inicio_seed = time.perf_counter()
+    registros = popular_banco(rng)
+    tempo_seed = time.perf_counter() - inicio_seed
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _contar_consulta)
+        cartoes = [u.card_uid for u in Usuario.query.all()]
+
+    coletor = Coletor()
+    fim = time.monotonic() + args.duracao
+    threads = [Leitor(i, cartoes, coletor, fim, random.Random(args.seed + i)) for i in range(args.leitores)]
+    threads += [Dashboard(i, cartoes, coletor, fim, random.Random(args.seed + 1000 + i)) for i in range(args.dashboards)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracao = time.perf_counter() - inicio
+
+    resultado = {
+        'commit': versao_git(),
+        'data': datetime.now(BR_TZ).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k not in ('saida', 'comparar')},
+        'seed': {'registros': registros, 'segundos': round(tempo_seed, 2)},
+        'duracao_s': round(duracao, 2),
+        'total_requisicoes': sum(len(v) for v in coletor.amostras.values()),
+        'rotas': resumir(coletor.amostras, duracao)
+    }
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            f.write(texto + '\n')
+    else:
+        print(texto)
+    if args.comparar:
+        comparar(resultado, args.comparar)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark da serialização das rotas de listagem (SQLite local).
+
+Popula um banco sintético com --registros batidas (100 mil por padrão) e mede,
+para cada rota, o melhor tempo entre --repeticoes chamadas e as linhas por
+segundo. O md5 de cada corpo vai junto no resultado: rodando o script em dois
+commits e comparando com --comparar dá para ver o ganho e confirmar que a
+saída continua byte a byte igual.
+
+Uso:
+  python benchmark_serializacao.py --saida antes.json          (no commit anterior)
+  python benchmark_serializacao.py --comparar antes.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Microbenchmark da serialização das listagens (SQLite local).")
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'ponto_serializacao.sqlite3'),
+                        help="Arquivo SQLite usado no teste (é recriado).")
+    parser.add_argument('--registros', type=int, default=100000)
+    parser.add_argument('--usuarios', type=int, default=2000)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--saida', help="Grava o JSON neste arquivo em vez da saída padrão.")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior para comparar linhas/s e md5.")
+    return parser.parse_args()
+
+args = parse_args()
+
+# O banco precisa estar definido antes de importar a API
+if os.path.exists(args.db):
+    os.remove(args.db)
+os.environ['DATABASE_URL'] = f'sqlite:///{args.db}'
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api import create_app, db, Usuario, RegistroPonto, BR_TZ  # noqa: E402
+
+app = create_app({'SWAGGER_ATIVO': False, 'METRICAS': False})
+
+# Nomes com acentos e aspas para exercitar o escape ASCII do JSON
+NOMES = ['Voluntário', 'João', 'Conceição', 'Zé "Bigode"', 'Ana\\Maria', 'Ñandú', 'Maria']
+
+def popular_banco(rng):
+    """Usuários com um ponto aberto cada e --registros batidas fechadas espalhadas em dois anos."""
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(Usuario), [
+            {'card_uid': f'{i:08X}', 'nome': f'{rng.choice(NOMES)} {i:04d}'} for i in range(args.usuarios)
+        ])
+        db.session.commit()
+        ids = [u.id for u in Usuario.query.order_by(Usuario.id)]
+
+        # Instante fixo: execuções em commits diferentes geram exatamente os mesmos dados
+        agora = datetime(2025, 6, 2, 12, 0, tzinfo=BR_TZ)
+        lote = []
+        for _ in range(args.registros - len(ids)):
+            entrada = agora - timedelta(seconds=rng.randint(3600, 730 * 86400))
+            saida = entrada + timedelta(seconds=rng.randint(600, 10 * 3600), microseconds=rng.choice([0, 250000]))
+            lote.append({'id_usuario': rng.choice(ids), 'data_entrada': entrada, 'data_saida': saida})
+        lote += [{'id_usuario': i, 'data_entrada': agora - timedelta(minutes=rng.randint(1, 600)), 'data_saida': None}
+                 for i in ids]
+        for i in range(0, len(lote), 10000):
+            db.session.execute(db.insert(RegistroPonto), lote[i:i + 10000])
+        db.session.commit()
+        return len(lote)
+
+ROTAS = [
+    ('GET /api/usuarios', '/api/usuarios', lambda corpo: len(json.loads(corpo))),
+    ('GET /api/usuarios/pontos-abertos', '/api/usuarios/pontos-abertos', lambda corpo: len(json.loads(corpo))),
+    ('GET /api/historico?limit=1000', '/api/historico?limit=1000', lambda corpo: len(json.loads(corpo))),
+    ('GET /api/export/json', '/api/export/json', lambda corpo: len(json.loads(corpo)['registros'])),
+    ('GET /api/export/json?formato=ndjson', '/api/export/json?formato=ndjson', lambda corpo: corpo.count(b'\n')),
+    ('GET /api/export/json?formato=csv', '/api/export/json?formato=csv', lambda corpo: corpo.count(b'\n') - 1),
+]
+
+def medir(cliente, url, contar):
+    melhor = None
+    for _ in range(args.repeticoes):
+        inicio = time.perf_counter()
+        resposta = cliente.get(url)
+        corpo = resposta.get_data()
+        segundos = time.perf_counter() - inicio
+        melhor = segundos if melhor is None else min(melhor, segundos)
+    linhas = contar(corpo)
+    return {
+        'status': resposta.status_code,
+        'linhas': linhas,
+        'melhor_s': round(melhor, 4),
+        'linhas_por_s': round(linhas / melhor) if melhor else None,
+        'bytes': len(corpo),
+        'md5': hashlib.md5(corpo).hexdigest()
+    }
+
+def versao_git():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def comparar(atual, caminho_anterior):
+    with open(caminho_anterior) as f:
+        anterior = json.load(f)
+    print(f"\n{'rota':40} {'linhas/s antes':>15} {'linhas/s agora':>15} {'ganho':>7}  bytes", file=sys.stderr)
+    for rota, dados in atual['rotas'].items():
+        antes = anterior.get('rotas', {}).get(rota, {})
+        agora = dados['linhas_por_s']
+        ganho = f"{agora / antes['linhas_por_s']:.2f}x" if antes.get('linhas_por_s') else 'novo'
+        iguais = 'iguais' if antes.get('md5') == dados['md5'] else 'DIFERENTES'
+        print(f"{rota:40} {antes.get('linhas_por_s', '-'):>15} {agora:>15} {ganho:>7}  {iguais}", file=sys.stderr)
+
+def main():
+    rng = random.Random(args.seed)
+    registros = popular_banco(rng)
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['is_admin'] = True
+    rotas = {rota: medir(cliente, url, contar) for rota, url, contar in ROTAS}
+
+    try:
+        import orjson  # noqa: F401
+        encoder = 'orjson'
+    except ImportError:
+        encoder = 'json'
+    resultado = {
+        'commit': versao_git(),
+        'data': datetime.now(BR_TZ).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k not in ('saida', 'comparar')},
+        'encoder_disponivel': encoder,
+        'registros': registros,
+        'rotas': rotas
+    }
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            f.write(texto + '\n')
+    else:
+        print(texto)
+    if args.comparar:
+        comparar(resultado, args.comparar)
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,6 @@
-from api import app
+from api import create_app
+
+app = create_app()
 
 if __name__ == "__main__":
     app.run()
\ No newline at end of file